@@ -3,7 +3,9 @@ from typing import Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Cookie, Depends, Header, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only
 import os
 from dotenv import load_dotenv
 
@@ -15,14 +17,31 @@ load_dotenv()
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-here-change-in-production")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "10080"))
+ARGON2_TIME_COST = int(os.getenv("ARGON2_TIME_COST", "2"))
+ARGON2_MEMORY_COST = int(os.getenv("ARGON2_MEMORY_COST", "19456"))  # KiB
+ARGON2_PARALLELISM = int(os.getenv("ARGON2_PARALLELISM", "1"))
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# New hashes are argon2id. bcrypt hashes from older accounts still verify and are
+# flagged for rehashing, which login does on the next successful sign-in.
+pwd_context = CryptContext(
+    schemes=["argon2", "bcrypt"],
+    deprecated="auto",
+    argon2__type="ID",
+    argon2__time_cost=ARGON2_TIME_COST,
+    argon2__memory_cost=ARGON2_MEMORY_COST,
+    argon2__parallelism=ARGON2_PARALLELISM,
+)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+def verify_and_update_password(plain_password: str, hashed_password: str) -> tuple[bool, Optional[str]]:
+    """Verify a password, also returning a fresh hash when the stored one uses outdated settings."""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
@@ -34,16 +53,16 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
-async def get_current_user(
-    access_token: Optional[str] = Cookie(default=None),
-    authorization: Optional[str] = Header(default=None),
-    db: Session = Depends(get_db),
-) -> models.User:
-    credentials_exception = HTTPException(
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+
+def _token_subject(access_token: Optional[str], authorization: Optional[str]) -> str:
+    """Return the ``sub`` claim of the bearer header (or cookie) token, raising 401 if it isn't valid."""
     token = None
     if authorization:
         scheme, _, credentials = authorization.partition(" ")
@@ -54,16 +73,60 @@ async def get_current_user(
         token = access_token
 
     if not token:
-        raise credentials_exception
+        raise _credentials_exception()
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            raise credentials_exception
+        sub: str = payload.get("sub")
+        if sub is None:
+            raise _credentials_exception()
     except JWTError:
-        raise credentials_exception
+        raise _credentials_exception()
+    return sub
+
+
+async def get_current_user(
+    access_token: Optional[str] = Cookie(default=None),
+    authorization: Optional[str] = Header(default=None),
+    db: AsyncSession = Depends(get_db),
+) -> models.User:
+    sub = _token_subject(access_token, authorization)
 
-    user = db.query(models.User).filter(models.User.email == email).first()
+    # Everything UserResponse needs — password_hash never leaves the database here
+    query = select(models.User).options(
+        load_only(
+            models.User.id,
+            models.User.email,
+            models.User.name,
+            models.User.role,
+            models.User.created_at,
+            models.User.user_config,
+        )
+    )
+    if sub.isdigit():
+        query = query.where(models.User.id == int(sub))
+    else:
+        # Tokens issued before the subject switched from email to user id
+        query = query.where(models.User.email == sub)
+    result = await db.execute(query)
+    user = result.scalar_one_or_none()
     if user is None:
-        raise credentials_exception
+        raise _credentials_exception()
     return user
+
+
+async def get_current_user_id(
+    access_token: Optional[str] = Cookie(default=None),
+    authorization: Optional[str] = Header(default=None),
+    db: AsyncSession = Depends(get_db),
+) -> int:
+    """Authenticated user's id, read from the token without loading the user row."""
+    sub = _token_subject(access_token, authorization)
+    if sub.isdigit():
+        return int(sub)
+
+    # Tokens issued before the subject switched from email to user id still need a lookup
+    result = await db.execute(select(models.User.id).where(models.User.email == sub))
+    user_id = result.scalar_one_or_none()
+    if user_id is None:
+        raise _credentials_exception()
+    return user_id
@@ -1,5 +1,8 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.responses import JSONResponse
 from starlette.exceptions import HTTPException as StarletteHTTPException
 import os
@@ -9,13 +12,11 @@ from dotenv import load_dotenv
 from sqlalchemy import text
 from database import engine, Base
 import models  # noqa: F401 — ensures models are registered before create_all
+from responses import ORJSONResponse
 from routers import auth, patients, medications, logs, summary, onboarding, saved_summaries, social_contacts
 
 load_dotenv()
 
-# Create all database tables on startup
-Base.metadata.create_all(bind=engine)
-
 # Safe column migrations — add new columns to existing tables without data loss
 _MIGRATIONS = [
     "ALTER TABLE daily_logs ADD COLUMN IF NOT EXISTS episode JSON",
@@ -30,6 +31,47 @@ _MIGRATIONS = [
     "ALTER TABLE treatment_plans ADD COLUMN IF NOT EXISTS therapies JSONB",
     "ALTER TABLE treatment_plans ADD COLUMN IF NOT EXISTS clinicians JSONB",
     "ALTER TABLE daily_logs ADD COLUMN IF NOT EXISTS log_type VARCHAR DEFAULT 'detailed'",
+    "CREATE INDEX IF NOT EXISTS ix_patients_caregiver ON patients (caregiver_id)",
+    "CREATE INDEX IF NOT EXISTS ix_medications_patient_active ON medications (patient_id, active)",
+    # One log per patient per day. Log saves upsert on this constraint, so if concurrent saves
+    # left duplicate (patient_id, date) rows, refuse to start and report them rather than pick
+    # a row to drop — they have to be merged by hand before the constraint can be added.
+    """
+    DO $$
+    DECLARE
+        dup_count int;
+        dup_sample text;
+    BEGIN
+        IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'uq_dailylog_patient_date') THEN
+            SELECT COUNT(*), array_to_string((array_agg(format('(%s, %s)', patient_id, date) ORDER BY patient_id, date))[1:20], ', ')
+            INTO dup_count, dup_sample
+            FROM (
+                SELECT patient_id, date FROM daily_logs
+                GROUP BY patient_id, date HAVING COUNT(*) > 1
+            ) dups;
+            IF dup_count > 0 THEN
+                RAISE EXCEPTION 'daily_logs has % duplicated (patient_id, date) pair(s), first 20: %. Resolve them before uq_dailylog_patient_date can be added.',
+                    dup_count, dup_sample;
+            END IF;
+            ALTER TABLE daily_logs ADD CONSTRAINT uq_dailylog_patient_date UNIQUE (patient_id, date);
+        END IF;
+    END $$
+    """,
+    # Convert log payload columns created as json to jsonb (stored pre-parsed, so reads and
+    # jsonb_array_elements skip re-parsing the text). Skips columns already converted.
+    """
+    DO $$
+    DECLARE col text;
+    BEGIN
+        FOR col IN
+            SELECT column_name FROM information_schema.columns
+            WHERE table_schema = current_schema() AND table_name = 'daily_logs' AND data_type = 'json'
+              AND column_name IN ('medications_taken', 'symptoms', 'medication_side_effects', 'activities', 'lifestyle')
+        LOOP
+            EXECUTE format('ALTER TABLE daily_logs ALTER COLUMN %I TYPE jsonb USING %I::jsonb', col, col);
+        END LOOP;
+    END $$
+    """,
 ]
 
 _SEED_DEFAULT_CONTACTS = """
@@ -47,14 +89,26 @@ _BACKFILL_CONTACTS_CREATED_AT = """
 UPDATE social_contacts SET created_at = NOW() WHERE created_at IS NULL
 """
 
-with engine.connect() as conn:
-    for stmt in _MIGRATIONS:
-        conn.execute(text(stmt))
-    conn.execute(text(_SEED_DEFAULT_CONTACTS))
-    conn.execute(text(_BACKFILL_CONTACTS_CREATED_AT))
-    conn.commit()
 
-app = FastAPI(title="TrueFit Meds API", version="1.0.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    async with engine.begin() as conn:
+        # Create all database tables on startup
+        await conn.run_sync(Base.metadata.create_all)
+        for stmt in _MIGRATIONS:
+            await conn.execute(text(stmt))
+        await conn.execute(text(_SEED_DEFAULT_CONTACTS))
+        await conn.execute(text(_BACKFILL_CONTACTS_CREATED_AT))
+    yield
+    await engine.dispose()
+
+
+app = FastAPI(
+    title="TrueFit Meds API",
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
+)
 
 # ALLOWED_ORIGINS: comma-separated explicit origins
 _origins_env = os.getenv(
@@ -124,6 +178,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Log history and summaries are large, highly repetitive JSON; a low level keeps CPU cost negligible
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=4)
+
 app.include_router(auth.router, prefix="/auth", tags=["auth"])
 app.include_router(patients.router, prefix="/patients", tags=["patients"])
 app.include_router(medications.router, prefix="/medications", tags=["medications"])
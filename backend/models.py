@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, Date, DateTime, Text, JSON, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, Float, Boolean, Date, DateTime, Text, JSON, ForeignKey, Enum, Index, UniqueConstraint
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -27,6 +28,9 @@ class User(Base):
 
 class Patient(Base):
     __tablename__ = "patients"
+    __table_args__ = (
+        Index("ix_patients_caregiver", "caregiver_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String)
@@ -44,6 +48,9 @@ class Patient(Base):
 
 class Medication(Base):
     __tablename__ = "medications"
+    __table_args__ = (
+        Index("ix_medications_patient_active", "patient_id", "active"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     patient_id = Column(Integer, ForeignKey("patients.id"))
@@ -58,6 +65,10 @@ class Medication(Base):
 
 class DailyLog(Base):
     __tablename__ = "daily_logs"
+    __table_args__ = (
+        # One log per patient per day; the backing index also serves every (patient_id, date) lookup
+        UniqueConstraint("patient_id", "date", name="uq_dailylog_patient_date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     patient_id = Column(Integer, ForeignKey("patients.id"))
@@ -65,23 +76,23 @@ class DailyLog(Base):
     date = Column(Date)
 
     # [{medication_id, taken: bool, time_taken: "HH:MM" | null}]
-    medications_taken = Column(JSON, nullable=True)
+    medications_taken = Column(JSONB, nullable=True)
 
     # [{name: str, severity: 1-10}]
-    symptoms = Column(JSON, nullable=True)
+    symptoms = Column(JSONB, nullable=True)
 
     # [{medication_id, medication_name, side_effects: [{name, severity}]}]
-    medication_side_effects = Column(JSON, nullable=True)
+    medication_side_effects = Column(JSONB, nullable=True)
 
     sleep_hours = Column(Float, nullable=True)
     mood_score = Column(Integer, nullable=True)
     water_intake_oz = Column(Float, nullable=True)
 
     # [{type: "music"|"art"|"journaling"|"brain_stimulating"|"exercise"|"outside"|"other", duration_minutes: int|null}]
-    activities = Column(JSON, nullable=True)
+    activities = Column(JSONB, nullable=True)
 
     # {smoked: bool, alcohol: bool, stressed: bool, ate_well: bool}
-    lifestyle = Column(JSON, nullable=True)
+    lifestyle = Column(JSONB, nullable=True)
 
     notes = Column(Text, nullable=True)
 
@@ -7,13 +7,15 @@ from datetime import datetime, timedelta
 
 import resend
 from fastapi import APIRouter, Depends, HTTPException, Response, status
-from sqlalchemy.orm import Session
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm.attributes import flag_modified
 
 from database import get_db
 import models
 import schemas
-from auth import get_password_hash, verify_password, create_access_token, get_current_user
+from auth import get_password_hash, verify_and_update_password, create_access_token, get_current_user
 
 logger = logging.getLogger(__name__)
 
@@ -50,66 +52,83 @@ def _set_auth_cookie(response: Response, token: str) -> None:
 
 
 @router.post("/register", response_model=schemas.AuthResponse)
-def register(user_data: schemas.UserCreate, response: Response, db: Session = Depends(get_db)):
-    existing = db.query(models.User).filter(models.User.email == user_data.email).first()
+async def register(user_data: schemas.UserCreate, response: Response, db: AsyncSession = Depends(get_db)):
+    result = await db.execute(select(models.User).where(models.User.email == user_data.email))
+    existing = result.scalar_one_or_none()
     if existing:
         raise HTTPException(status_code=400, detail="Email already registered")
 
     user = models.User(
         email=user_data.email,
-        password_hash=get_password_hash(user_data.password),
+        password_hash=await run_in_threadpool(get_password_hash, user_data.password),
         name=user_data.name,
         role=user_data.role.value,
     )
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
 
-    token = create_access_token({"sub": user.email})
+    token = create_access_token({"sub": str(user.id), "email": user.email})
     _set_auth_cookie(response, token)
     return {"user": user, "access_token": token, "token_type": "bearer"}
 
 
 @router.post("/login", response_model=schemas.AuthResponse)
-def login(credentials: schemas.UserLogin, response: Response, db: Session = Depends(get_db)):
-    user = db.query(models.User).filter(models.User.email == credentials.email).first()
-    if not user or not verify_password(credentials.password, user.password_hash):
+async def login(credentials: schemas.UserLogin, response: Response, db: AsyncSession = Depends(get_db)):
+    result = await db.execute(select(models.User).where(models.User.email == credentials.email))
+    user = result.scalar_one_or_none()
+    valid, new_hash = False, None
+    if user:
+        valid, new_hash = await run_in_threadpool(
+            verify_and_update_password, credentials.password, user.password_hash
+        )
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
         )
 
-    token = create_access_token({"sub": user.email})
+    if new_hash:
+        # Upgrade legacy bcrypt (or weaker argon2) hashes while we have the plaintext
+        user.password_hash = new_hash
+        await db.commit()
+
+    token = create_access_token({"sub": str(user.id), "email": user.email})
     _set_auth_cookie(response, token)
     return {"user": user, "access_token": token, "token_type": "bearer"}
 
 
 @router.post("/logout")
-def logout(response: Response):
+async def logout(response: Response):
     response.delete_cookie(key="access_token", httponly=True, secure=True, samesite="none")
     return {"message": "Logged out"}
 
 
 @router.get("/me", response_model=schemas.UserResponse)
-def me(current_user: models.User = Depends(get_current_user)):
+async def me(current_user: models.User = Depends(get_current_user)):
     return current_user
 
 
 @router.post("/forgot-password")
-def forgot_password(body: schemas.ForgotPasswordRequest, db: Session = Depends(get_db)):
+async def forgot_password(body: schemas.ForgotPasswordRequest, db: AsyncSession = Depends(get_db)):
     # Rate limit silently — always return 200 to avoid leaking info
     if not _rate_limit_ok(body.email.lower()):
         return {"message": "If that email is registered, a reset link has been sent."}
 
-    user = db.query(models.User).filter(models.User.email == body.email).first()
+    result = await db.execute(select(models.User).where(models.User.email == body.email))
+    user = result.scalar_one_or_none()
     if not user:
         return {"message": "If that email is registered, a reset link has been sent."}
 
     # Invalidate any existing unused tokens for this user
-    db.query(models.PasswordResetToken).filter(
-        models.PasswordResetToken.user_id == user.id,
-        models.PasswordResetToken.used == False,  # noqa: E712
-    ).update({"used": True})
+    await db.execute(
+        update(models.PasswordResetToken)
+        .where(
+            models.PasswordResetToken.user_id == user.id,
+            models.PasswordResetToken.used == False,  # noqa: E712
+        )
+        .values(used=True)
+    )
 
     token = secrets.token_urlsafe(32)
     reset_token = models.PasswordResetToken(
@@ -118,14 +137,14 @@ def forgot_password(body: schemas.ForgotPasswordRequest, db: Session = Depends(g
         expires_at=datetime.utcnow() + timedelta(hours=1),
     )
     db.add(reset_token)
-    db.commit()
+    await db.commit()
 
     frontend_url = os.getenv("FRONTEND_URL", "http://localhost:3000")
     reset_link = f"{frontend_url}/reset-password/?token={token}"
     from_email = os.getenv("RESEND_FROM_EMAIL", "onboarding@resend.dev")
 
     try:
-        resend.Emails.send({
+        await run_in_threadpool(resend.Emails.send, {
             "from": from_email,
             "to": user.email,
             "subject": "Reset your Advocate password",
@@ -148,36 +167,39 @@ def forgot_password(body: schemas.ForgotPasswordRequest, db: Session = Depends(g
 
 
 @router.post("/reset-password")
-def reset_password(body: schemas.ResetPasswordRequest, db: Session = Depends(get_db)):
-    reset_token = db.query(models.PasswordResetToken).filter(
-        models.PasswordResetToken.token == body.token,
-        models.PasswordResetToken.used == False,  # noqa: E712
-    ).first()
+async def reset_password(body: schemas.ResetPasswordRequest, db: AsyncSession = Depends(get_db)):
+    result = await db.execute(
+        select(models.PasswordResetToken).where(
+            models.PasswordResetToken.token == body.token,
+            models.PasswordResetToken.used == False,  # noqa: E712
+        )
+    )
+    reset_token = result.scalar_one_or_none()
 
     if not reset_token or reset_token.expires_at < datetime.utcnow():
         raise HTTPException(status_code=400, detail="Invalid or expired reset link.")
 
-    user = db.query(models.User).filter(models.User.id == reset_token.user_id).first()
+    user = await db.get(models.User, reset_token.user_id)
     if not user:
         raise HTTPException(status_code=400, detail="Invalid or expired reset link.")
 
-    user.password_hash = get_password_hash(body.new_password)
+    user.password_hash = await run_in_threadpool(get_password_hash, body.new_password)
     reset_token.used = True
-    db.commit()
+    await db.commit()
 
     return {"message": "Password updated successfully."}
 
 
 @router.patch("/config", response_model=schemas.UserResponse)
-def update_config(
+async def update_config(
     patch: schemas.UserConfigPatch,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: models.User = Depends(get_current_user),
 ):
     existing = dict(current_user.user_config or {})
     existing.update(patch.updates)
     current_user.user_config = existing
     flag_modified(current_user, "user_config")
-    db.commit()
-    db.refresh(current_user)
+    await db.commit()
+    await db.refresh(current_user)
     return current_user
@@ -1,15 +1,37 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
 from datetime import datetime, timedelta, date as date_type
+import orjson
+from cachetools import TTLCache
 
-from database import get_db
+from database import SessionLocal, get_db, load_options
 import models
 import schemas
-from auth import get_current_user
+from auth import get_current_user_id
+from responses import ORJSONResponse
 
 router = APIRouter()
 
+# (patient_id, date) → encoded JSON for GET /today, which the dashboard polls. Anything that
+# writes a log must call invalidate_today_log; the TTL bounds staleness across workers.
+# Bounded by total encoded size rather than entry count, since a log can carry a photo;
+# bodies over _MAX_CACHED_BODY (an unusually large photo) are served uncached.
+_today_cache: TTLCache = TTLCache(maxsize=16 * 1024 * 1024, ttl=60, getsizeof=len)
+_MAX_CACHED_BODY = 512 * 1024
+# Bumped on every invalidation, so a read that overlapped a write knows not to cache its result
+_today_invalidations = 0
+
+
+def invalidate_today_log(patient_id: int, log_date) -> None:
+    """Drop the cached GET /today body for a patient's log on the given date."""
+    global _today_invalidations
+    _today_invalidations += 1
+    _today_cache.pop((patient_id, log_date), None)
+
 
 def _serialize_log_field(value):
     """Convert Pydantic models in lists/dicts to plain dicts for JSON storage."""
@@ -20,36 +42,70 @@ def _serialize_log_field(value):
     return value
 
 
-def _verify_patient(patient_id: int, current_user: models.User, db: Session) -> models.Patient:
-    patient = (
-        db.query(models.Patient)
-        .filter(
+def _log_to_dict(log: models.DailyLog) -> dict:
+    """Serialize a DailyLog straight from its columns (same shape as DailyLogResponse)."""
+    return {
+        "id": log.id,
+        "patient_id": log.patient_id,
+        "logged_by": log.logged_by,
+        "date": log.date,
+        "medications_taken": log.medications_taken,
+        "symptoms": log.symptoms,
+        "medication_side_effects": log.medication_side_effects,
+        "sleep_hours": log.sleep_hours,
+        "mood_score": log.mood_score,
+        "water_intake_oz": log.water_intake_oz,
+        "activities": log.activities,
+        "lifestyle": log.lifestyle,
+        "notes": log.notes,
+        "episode": log.episode,
+        "vitals": log.vitals,
+        "photo": log.photo,
+        "socialization": log.socialization,
+        "log_type": log.log_type,
+        "created_at": log.created_at,
+    }
+
+
+async def _verify_patient(patient_id: int, current_user_id: int, db: AsyncSession) -> models.Patient:
+    result = await db.execute(
+        select(models.Patient).options(*load_options()).where(
             models.Patient.id == patient_id,
-            models.Patient.caregiver_id == current_user.id,
+            models.Patient.caregiver_id == current_user_id,
         )
-        .first()
     )
+    patient = result.scalar_one_or_none()
     if not patient:
         raise HTTPException(status_code=404, detail="Patient not found")
     return patient
 
 
+async def _upsert_log(db: AsyncSession, patient_id: int, log_date, logged_by: int, fields: dict) -> models.DailyLog:
+    """Create the patient's log for a date, or overwrite ``fields`` on it, in one INSERT ... ON CONFLICT."""
+    stmt = pg_insert(models.DailyLog).values(
+        patient_id=patient_id,
+        logged_by=logged_by,
+        date=log_date,
+        **fields,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["patient_id", "date"],
+        set_={key: stmt.excluded[key] for key in fields},
+    ).returning(models.DailyLog)
+    result = await db.execute(stmt, execution_options={"populate_existing": True})
+    log = result.scalar_one()
+    await db.commit()
+    invalidate_today_log(patient_id, log_date)
+    return log
+
+
 @router.post("/", response_model=schemas.DailyLogResponse)
-def create_or_update_log(
+async def create_or_update_log(
     log_data: schemas.DailyLogCreate,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    current_user_id: int = Depends(get_current_user_id),
 ):
-    patient = (
-        db.query(models.Patient)
-        .filter(
-            models.Patient.id == log_data.patient_id,
-            models.Patient.caregiver_id == current_user.id,
-        )
-        .first()
-    )
-    if not patient:
-        raise HTTPException(status_code=404, detail="Patient not found")
+    await _verify_patient(log_data.patient_id, current_user_id, db)
 
     fields = {
         "medications_taken": _serialize_log_field(log_data.medications_taken),
@@ -68,42 +124,18 @@ def create_or_update_log(
         "log_type": log_data.log_type or "detailed",
     }
 
-    existing = (
-        db.query(models.DailyLog)
-        .filter(
-            models.DailyLog.patient_id == log_data.patient_id,
-            models.DailyLog.date == log_data.date,
-        )
-        .first()
-    )
-
-    if existing:
-        for key, val in fields.items():
-            setattr(existing, key, val)
-        db.commit()
-        db.refresh(existing)
-        return existing
-
-    log = models.DailyLog(
-        patient_id=log_data.patient_id,
-        logged_by=current_user.id,
-        date=log_data.date,
-        **fields,
-    )
-    db.add(log)
-    db.commit()
-    db.refresh(log)
-    return log
+    log = await _upsert_log(db, log_data.patient_id, log_data.date, current_user_id, fields)
+    return ORJSONResponse(schemas.DailyLogResponse.model_validate(log).to_json_bytes())
 
 
-@router.get("/{patient_id}/today", response_model=Optional[schemas.DailyLogResponse])
-def get_today_log(
+@router.get("/{patient_id}/today")
+async def get_today_log(
     patient_id: int,
     date: Optional[str] = Query(default=None, description="Client local date YYYY-MM-DD"),
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    current_user_id: int = Depends(get_current_user_id),
 ):
-    _verify_patient(patient_id, current_user, db)
+    await _verify_patient(patient_id, current_user_id, db)
 
     if date:
         try:
@@ -112,48 +144,59 @@ def get_today_log(
             today = datetime.now().date()
     else:
         today = datetime.now().date()
-    return (
-        db.query(models.DailyLog)
-        .filter(
-            models.DailyLog.patient_id == patient_id,
-            models.DailyLog.date == today,
+
+    key = (patient_id, today)
+    body = _today_cache.get(key)
+    if body is None:
+        invalidations = _today_invalidations
+        result = await db.execute(
+            select(models.DailyLog).options(*load_options()).where(
+                models.DailyLog.patient_id == patient_id,
+                models.DailyLog.date == today,
+            )
         )
-        .first()
-    )
+        log = result.scalar_one_or_none()
+        body = orjson.dumps(_log_to_dict(log) if log else None)
+        # A write committed during the read may have already evicted this key; don't re-cache
+        # what could be the pre-write body
+        if invalidations == _today_invalidations and len(body) <= _MAX_CACHED_BODY:
+            _today_cache[key] = body
+    return ORJSONResponse(body)
 
 
 @router.get("/{patient_id}/missed-days")
-def get_missed_days(
+async def get_missed_days(
     patient_id: int,
     days: int = Query(default=30),
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    current_user_id: int = Depends(get_current_user_id),
 ):
-    _verify_patient(patient_id, current_user, db)
+    await _verify_patient(patient_id, current_user_id, db)
 
     today = datetime.now().date()
     yesterday = today - timedelta(days=1)
 
-    first_log = (
-        db.query(models.DailyLog)
-        .filter(models.DailyLog.patient_id == patient_id)
+    result = await db.execute(
+        select(models.DailyLog.date)
+        .where(models.DailyLog.patient_id == patient_id)
         .order_by(models.DailyLog.date.asc())
-        .first()
+        .limit(1)
     )
-    if not first_log:
+    first_date = result.scalar_one_or_none()
+    if not first_date:
         return {"missed_days": []}
 
     # Only look for missed days after the first log, up to 'days' days back
-    start = max(first_log.date + timedelta(days=1), today - timedelta(days=days))
+    start = max(first_date + timedelta(days=1), today - timedelta(days=days))
 
-    logged_dates = {
-        row.date
-        for row in db.query(models.DailyLog.date).filter(
+    result = await db.execute(
+        select(models.DailyLog.date).where(
             models.DailyLog.patient_id == patient_id,
             models.DailyLog.date >= start,
             models.DailyLog.date <= yesterday,
-        ).all()
-    }
+        )
+    )
+    logged_dates = set(result.scalars().all())
 
     missed = []
     current = start
@@ -166,37 +209,37 @@ def get_missed_days(
 
 
 @router.get("/{patient_id}/date/{date_str}", response_model=Optional[schemas.DailyLogResponse])
-def get_log_by_date(
+async def get_log_by_date(
     patient_id: int,
     date_str: str,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    current_user_id: int = Depends(get_current_user_id),
 ):
-    _verify_patient(patient_id, current_user, db)
+    await _verify_patient(patient_id, current_user_id, db)
 
     try:
         target_date = datetime.strptime(date_str, "%Y-%m-%d").date()
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD.")
 
-    return (
-        db.query(models.DailyLog)
-        .filter(
+    result = await db.execute(
+        select(models.DailyLog).options(*load_options()).where(
             models.DailyLog.patient_id == patient_id,
             models.DailyLog.date == target_date,
         )
-        .first()
     )
+    log = result.scalar_one_or_none()
+    return ORJSONResponse(schemas.DailyLogResponse.model_validate(log).to_json_bytes() if log else None)
 
 
 @router.post("/{patient_id}/quick", response_model=schemas.DailyLogResponse)
-def quick_log(
+async def quick_log(
     patient_id: int,
     body: schemas.QuickLogRequest,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    current_user_id: int = Depends(get_current_user_id),
 ):
-    _verify_patient(patient_id, current_user, db)
+    await _verify_patient(patient_id, current_user_id, db)
 
     if body.type == "nothing_notable":
         fields: dict = {"log_type": "nothing_notable"}
@@ -207,24 +250,25 @@ def quick_log(
     elif body.type == "same_as_yesterday":
         # Prefer the immediately preceding calendar day; fall back to most recent log before the target date
         prev_date = body.date - timedelta(days=1)
-        previous = (
-            db.query(models.DailyLog)
-            .filter(
+        result = await db.execute(
+            select(models.DailyLog).options(*load_options()).where(
                 models.DailyLog.patient_id == patient_id,
                 models.DailyLog.date == prev_date,
             )
-            .first()
         )
+        previous = result.scalar_one_or_none()
         if not previous:
-            previous = (
-                db.query(models.DailyLog)
-                .filter(
+            result = await db.execute(
+                select(models.DailyLog)
+                .options(*load_options())
+                .where(
                     models.DailyLog.patient_id == patient_id,
                     models.DailyLog.date < body.date,
                 )
                 .order_by(models.DailyLog.date.desc())
-                .first()
+                .limit(1)
             )
+            previous = result.scalars().first()
 
         if previous:
             fields = {
@@ -248,45 +292,35 @@ def quick_log(
     else:
         raise HTTPException(status_code=400, detail="type must be 'same_as_yesterday', 'nothing_notable', or 'catch_up_note'")
 
-    existing = (
-        db.query(models.DailyLog)
-        .filter(
-            models.DailyLog.patient_id == patient_id,
-            models.DailyLog.date == body.date,
-        )
-        .first()
-    )
-
-    if existing:
-        for key, val in fields.items():
-            setattr(existing, key, val)
-        db.commit()
-        db.refresh(existing)
-        return existing
-
-    log = models.DailyLog(
-        patient_id=patient_id,
-        logged_by=current_user.id,
-        date=body.date,
-        **fields,
-    )
-    db.add(log)
-    db.commit()
-    db.refresh(log)
-    return log
+    log = await _upsert_log(db, patient_id, body.date, current_user_id, fields)
+    return ORJSONResponse(schemas.DailyLogResponse.model_validate(log).to_json_bytes())
 
 
-@router.get("/{patient_id}", response_model=List[schemas.DailyLogResponse])
-def get_logs(
+@router.get("/{patient_id}")
+async def get_logs(
     patient_id: int,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    current_user_id: int = Depends(get_current_user_id),
 ):
-    _verify_patient(patient_id, current_user, db)
+    await _verify_patient(patient_id, current_user_id, db)
 
-    return (
-        db.query(models.DailyLog)
-        .filter(models.DailyLog.patient_id == patient_id)
+    stmt = (
+        select(models.DailyLog)
+        .options(*load_options())
+        .where(models.DailyLog.patient_id == patient_id)
         .order_by(models.DailyLog.date.desc())
-        .all()
+        .execution_options(yield_per=50)
     )
+
+    async def _stream():
+        # Rows (photos included) are fetched 50 at a time from a server-side cursor and written out
+        # as they arrive. The request's session is closed before the body is sent, so use our own.
+        async with SessionLocal() as session:
+            yield b"["
+            sep = b""
+            async for log in await session.stream_scalars(stmt):
+                yield sep + orjson.dumps(_log_to_dict(log))
+                sep = b","
+            yield b"]"
+
+    return StreamingResponse(_stream(), media_type="application/json")
@@ -1,11 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 
-from database import get_db
+from database import get_db, load_options
 import models
 import schemas
-from auth import get_current_user
+from auth import get_current_user_id
+from responses import ORJSONResponse
 
 router = APIRouter()
 
@@ -445,55 +447,56 @@ def lookup_known_side_effects(med_name: str) -> list[dict]:
     return []
 
 
-def _get_owned_medication(medication_id: int, current_user: models.User, db: Session):
+async def _get_owned_medication(medication_id: int, current_user_id: int, db: AsyncSession):
     """Return medication if it belongs to one of the current user's patients."""
-    med = (
-        db.query(models.Medication)
+    result = await db.execute(
+        select(models.Medication)
+        .options(*load_options())
         .join(models.Patient)
-        .filter(
+        .where(
             models.Medication.id == medication_id,
-            models.Patient.caregiver_id == current_user.id,
+            models.Patient.caregiver_id == current_user_id,
         )
-        .first()
     )
+    med = result.scalar_one_or_none()
     if not med:
         raise HTTPException(status_code=404, detail="Medication not found")
     return med
 
 
 @router.put("/{medication_id}", response_model=schemas.MedicationResponse)
-def update_medication(
+async def update_medication(
     medication_id: int,
     med_data: schemas.MedicationUpdate,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    current_user_id: int = Depends(get_current_user_id),
 ):
-    med = _get_owned_medication(medication_id, current_user, db)
+    med = await _get_owned_medication(medication_id, current_user_id, db)
     for field, value in med_data.model_dump(exclude_unset=True).items():
         setattr(med, field, value)
-    db.commit()
-    db.refresh(med)
-    return med
+    await db.commit()
+    await db.refresh(med)
+    return ORJSONResponse(schemas.MedicationResponse.model_validate(med).to_json_bytes())
 
 
 @router.delete("/{medication_id}")
-def deactivate_medication(
+async def deactivate_medication(
     medication_id: int,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    current_user_id: int = Depends(get_current_user_id),
 ):
-    med = _get_owned_medication(medication_id, current_user, db)
+    med = await _get_owned_medication(medication_id, current_user_id, db)
     med.active = False
-    db.commit()
+    await db.commit()
     return {"message": "Medication deactivated"}
 
 
 @router.get("/{medication_id}/known-side-effects", response_model=List[schemas.KnownSideEffectResponse])
-def get_known_side_effects(
+async def get_known_side_effects(
     medication_id: int,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    current_user_id: int = Depends(get_current_user_id),
 ):
     """Return known side effects for a medication based on its name."""
-    med = _get_owned_medication(medication_id, current_user, db)
+    med = await _get_owned_medication(medication_id, current_user_id, db)
     return lookup_known_side_effects(med.name)
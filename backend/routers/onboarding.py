@@ -1,5 +1,5 @@
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 import json
 import os
 from dotenv import load_dotenv
@@ -30,9 +30,9 @@ _DEFAULT_USER_CONFIG = {
 
 
 @router.post("/config", response_model=schemas.UserResponse)
-def complete_onboarding_survey(
+async def complete_onboarding_survey(
     survey: schemas.OnboardingSurveyRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: models.User = Depends(get_current_user),
 ):
     config = _DEFAULT_USER_CONFIG.copy()
@@ -40,7 +40,7 @@ def complete_onboarding_survey(
     try:
         api_key = os.getenv("ANTHROPIC_API_KEY")
         if api_key:
-            client = anthropic.Anthropic(api_key=api_key)
+            client = anthropic.AsyncAnthropic(api_key=api_key)
 
             system_prompt = (
                 "You are a health tracking assistant. Generate a personalized caregiver dashboard config. "
@@ -79,7 +79,7 @@ Return exactly this JSON structure:
   "summary_style": "one of: compassionate (mental health/dementia/pediatric), clinical (physical/neurological conditions), adaptive (general)"
 }}"""
 
-            message = client.messages.create(
+            message = await client.messages.create(
                 model="claude-sonnet-4-20250514",
                 max_tokens=1024,
                 system=system_prompt,
@@ -107,6 +107,6 @@ Return exactly this JSON structure:
         pass  # Never let onboarding break — fall back to universal defaults
 
     current_user.user_config = config
-    db.commit()
-    db.refresh(current_user)
+    await db.commit()
+    await db.refresh(current_user)
     return current_user
@@ -1,125 +1,172 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 import json
 import os
 from dotenv import load_dotenv
-from openai import OpenAI
+from openai import AsyncOpenAI
 
-from database import get_db
+from database import get_db, load_options
 import models
 import schemas
-from auth import get_current_user
+from auth import get_current_user_id
+from responses import ORJSONResponse
 
 load_dotenv()
 
 router = APIRouter()
 
+# PatientResponse embeds these; load them in one extra IN (...) query each instead of one per patient
+_PATIENT_RESPONSE_LOADS = (
+    selectinload(models.Patient.medications),
+    selectinload(models.Patient.treatment_plan),
+)
+
+
+def _medication_to_dict(med: models.Medication) -> dict:
+    return {
+        "id": med.id,
+        "patient_id": med.patient_id,
+        "name": med.name,
+        "dose": med.dose,
+        "frequency": med.frequency,
+        "time_of_day": med.time_of_day,
+        "active": med.active,
+    }
+
+
+def _treatment_plan_to_dict(plan: models.TreatmentPlan) -> dict:
+    return {
+        "id": plan.id,
+        "patient_id": plan.patient_id,
+        "therapies": plan.therapies,
+        "clinicians": plan.clinicians,
+        "bedtime": plan.bedtime,
+        "wake_time": plan.wake_time,
+        "sleep_notes": plan.sleep_notes,
+        "substances_to_avoid": plan.substances_to_avoid,
+        "care_goals": plan.care_goals,
+        "next_appointment_date": plan.next_appointment_date,
+        "next_appointment_with": plan.next_appointment_with,
+        "created_at": plan.created_at,
+        "updated_at": plan.updated_at,
+    }
+
+
+def _patient_to_dict(patient: models.Patient) -> dict:
+    """Serialize a Patient straight from its columns (same shape as PatientResponse)."""
+    return {
+        "id": patient.id,
+        "name": patient.name,
+        "date_of_birth": patient.date_of_birth,
+        "diagnosis": patient.diagnosis,
+        "notes": patient.notes,
+        "caregiver_id": patient.caregiver_id,
+        "medications": [_medication_to_dict(med) for med in patient.medications],
+        "dashboard_config": patient.dashboard_config,
+        "treatment_plan": _treatment_plan_to_dict(patient.treatment_plan) if patient.treatment_plan else None,
+    }
+
+
+async def _load_patient_relations(patient: models.Patient, db: AsyncSession) -> None:
+    # PatientResponse embeds medications and treatment_plan; async sessions can't lazy-load them
+    await db.refresh(patient, ["medications", "treatment_plan"])
+
 
 @router.post("/", response_model=schemas.PatientResponse)
-def create_patient(
+async def create_patient(
     patient_data: schemas.PatientCreate,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    current_user_id: int = Depends(get_current_user_id),
 ):
     patient = models.Patient(
         name=patient_data.name,
         date_of_birth=patient_data.date_of_birth,
         diagnosis=patient_data.diagnosis,
         notes=patient_data.notes,
-        caregiver_id=current_user.id,
+        caregiver_id=current_user_id,
     )
     db.add(patient)
-    db.flush()  # get patient.id without committing
-
-    for med_data in (patient_data.medications or []):
-        med = models.Medication(
-            patient_id=patient.id,
-            name=med_data.name,
-            dose=med_data.dose,
-            frequency=med_data.frequency,
-            time_of_day=med_data.time_of_day,
-        )
-        db.add(med)
-
-    db.commit()
-    db.refresh(patient)
-    return patient
-
-
-@router.get("/", response_model=List[schemas.PatientResponse])
-def get_patients(
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
+    await db.flush()  # get patient.id without committing
+
+    # One multi-row INSERT instead of one per medication
+    meds = [
+        {
+            "patient_id": patient.id,
+            "name": med_data.name,
+            "dose": med_data.dose,
+            "frequency": med_data.frequency,
+            "time_of_day": med_data.time_of_day,
+        }
+        for med_data in (patient_data.medications or [])
+    ]
+    if meds:
+        await db.execute(insert(models.Medication), meds)
+
+    await db.commit()
+    await _load_patient_relations(patient, db)
+    return ORJSONResponse(schemas.PatientResponse.model_validate(patient).to_json_bytes())
+
+
+@router.get("/")
+async def get_patients(
+    db: AsyncSession = Depends(get_db),
+    current_user_id: int = Depends(get_current_user_id),
 ):
-    return (
-        db.query(models.Patient)
-        .filter(models.Patient.caregiver_id == current_user.id)
-        .all()
+    result = await db.execute(
+        select(models.Patient)
+        .options(*load_options(*_PATIENT_RESPONSE_LOADS))
+        .where(models.Patient.caregiver_id == current_user_id)
     )
+    return ORJSONResponse([_patient_to_dict(patient) for patient in result.scalars()])
 
 
-@router.get("/{patient_id}", response_model=schemas.PatientResponse)
-def get_patient(
+@router.get("/{patient_id}")
+async def get_patient(
     patient_id: int,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    current_user_id: int = Depends(get_current_user_id),
 ):
-    patient = (
-        db.query(models.Patient)
-        .filter(
+    result = await db.execute(
+        select(models.Patient)
+        .options(*load_options(*_PATIENT_RESPONSE_LOADS))
+        .where(
             models.Patient.id == patient_id,
-            models.Patient.caregiver_id == current_user.id,
+            models.Patient.caregiver_id == current_user_id,
         )
-        .first()
     )
+    patient = result.scalar_one_or_none()
     if not patient:
         raise HTTPException(status_code=404, detail="Patient not found")
-    return patient
+    return ORJSONResponse(_patient_to_dict(patient))
 
 
 @router.patch("/{patient_id}", response_model=schemas.PatientResponse)
-def update_patient(
+async def update_patient(
     patient_id: int,
     data: schemas.PatientUpdate,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    current_user_id: int = Depends(get_current_user_id),
 ):
-    patient = (
-        db.query(models.Patient)
-        .filter(
-            models.Patient.id == patient_id,
-            models.Patient.caregiver_id == current_user.id,
-        )
-        .first()
-    )
-    if not patient:
-        raise HTTPException(status_code=404, detail="Patient not found")
+    patient = await _get_owned_patient(patient_id, current_user_id, db)
 
     for field, value in data.model_dump(exclude_unset=True).items():
         setattr(patient, field, value)
-    db.commit()
-    db.refresh(patient)
-    return patient
+    await db.commit()
+    await db.refresh(patient)
+    await _load_patient_relations(patient, db)
+    return ORJSONResponse(schemas.PatientResponse.model_validate(patient).to_json_bytes())
 
 
 @router.post("/{patient_id}/medications", response_model=schemas.MedicationResponse)
-def add_medication(
+async def add_medication(
     patient_id: int,
     med_data: schemas.MedicationCreate,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    current_user_id: int = Depends(get_current_user_id),
 ):
-    patient = (
-        db.query(models.Patient)
-        .filter(
-            models.Patient.id == patient_id,
-            models.Patient.caregiver_id == current_user.id,
-        )
-        .first()
-    )
-    if not patient:
-        raise HTTPException(status_code=404, detail="Patient not found")
+    await _get_owned_patient(patient_id, current_user_id, db)
 
     med = models.Medication(
         patient_id=patient_id,
@@ -129,33 +176,37 @@ def add_medication(
         time_of_day=med_data.time_of_day,
     )
     db.add(med)
-    db.commit()
-    db.refresh(med)
-    return med
+    await db.commit()
+    await db.refresh(med)
+    return ORJSONResponse(schemas.MedicationResponse.model_validate(med).to_json_bytes())
 
 
-def _get_owned_patient(patient_id: int, current_user: models.User, db: Session) -> models.Patient:
-    patient = (
-        db.query(models.Patient)
-        .filter(
+async def _get_owned_patient(patient_id: int, current_user_id: int, db: AsyncSession) -> models.Patient:
+    result = await db.execute(
+        select(models.Patient).options(*load_options()).where(
             models.Patient.id == patient_id,
-            models.Patient.caregiver_id == current_user.id,
+            models.Patient.caregiver_id == current_user_id,
         )
-        .first()
     )
+    patient = result.scalar_one_or_none()
     if not patient:
         raise HTTPException(status_code=404, detail="Patient not found")
     return patient
 
 
 @router.get("/{patient_id}/treatment-plan", response_model=schemas.TreatmentPlanResponse)
-def get_treatment_plan(
+async def get_treatment_plan(
     patient_id: int,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    current_user_id: int = Depends(get_current_user_id),
 ):
-    _get_owned_patient(patient_id, current_user, db)
-    plan = db.query(models.TreatmentPlan).filter(models.TreatmentPlan.patient_id == patient_id).first()
+    await _get_owned_patient(patient_id, current_user_id, db)
+    result = await db.execute(
+        select(models.TreatmentPlan)
+        .options(*load_options())
+        .where(models.TreatmentPlan.patient_id == patient_id)
+    )
+    plan = result.scalar_one_or_none()
     if not plan:
         raise HTTPException(status_code=404, detail="No treatment plan found")
     return plan
@@ -163,22 +214,27 @@ def get_treatment_plan(
 
 @router.post("/{patient_id}/treatment-plan", response_model=schemas.TreatmentPlanResponse)
 @router.put("/{patient_id}/treatment-plan", response_model=schemas.TreatmentPlanResponse)
-def upsert_treatment_plan(
+async def upsert_treatment_plan(
     patient_id: int,
     data: schemas.TreatmentPlanCreate,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    current_user_id: int = Depends(get_current_user_id),
 ):
-    _get_owned_patient(patient_id, current_user, db)
-    plan = db.query(models.TreatmentPlan).filter(models.TreatmentPlan.patient_id == patient_id).first()
+    await _get_owned_patient(patient_id, current_user_id, db)
+    result = await db.execute(
+        select(models.TreatmentPlan)
+        .options(*load_options())
+        .where(models.TreatmentPlan.patient_id == patient_id)
+    )
+    plan = result.scalar_one_or_none()
     if plan:
         for field, value in data.model_dump(exclude_unset=True).items():
             setattr(plan, field, value)
     else:
         plan = models.TreatmentPlan(patient_id=patient_id, **data.model_dump(exclude_unset=True))
         db.add(plan)
-    db.commit()
-    db.refresh(plan)
+    await db.commit()
+    await db.refresh(plan)
     return plan
 
 
@@ -196,22 +252,13 @@ _DEFAULT_CONFIG = {
 
 
 @router.post("/{patient_id}/generate-config", response_model=schemas.PatientResponse)
-def generate_config(
+async def generate_config(
     patient_id: int,
     survey: schemas.IntakeSurveyRequest,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    current_user_id: int = Depends(get_current_user_id),
 ):
-    patient = (
-        db.query(models.Patient)
-        .filter(
-            models.Patient.id == patient_id,
-            models.Patient.caregiver_id == current_user.id,
-        )
-        .first()
-    )
-    if not patient:
-        raise HTTPException(status_code=404, detail="Patient not found")
+    patient = await _get_owned_patient(patient_id, current_user_id, db)
 
     system_prompt = (
         "You are a health tracking assistant. Generate a personalized caregiver dashboard config. "
@@ -251,8 +298,8 @@ Return exactly this JSON structure:
         api_key = os.getenv("OPENAI_API_KEY")
         if api_key:
             model = os.getenv("OPENAI_MODEL", "gpt-4.1-mini")
-            client = OpenAI(api_key=api_key)
-            completion = client.chat.completions.create(
+            client = AsyncOpenAI(api_key=api_key)
+            completion = await client.chat.completions.create(
                 model=model,
                 response_format={"type": "json_object"},
                 messages=[
@@ -274,6 +321,7 @@ Return exactly this JSON structure:
         pass  # Fall back to default config — onboarding must not break
 
     patient.dashboard_config = config
-    db.commit()
-    db.refresh(patient)
-    return patient
+    await db.commit()
+    await db.refresh(patient)
+    await _load_patient_relations(patient, db)
+    return ORJSONResponse(schemas.PatientResponse.model_validate(patient).to_json_bytes())
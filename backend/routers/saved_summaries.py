@@ -1,31 +1,34 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 
 from database import get_db
 from models import SavedSummary, Patient
 from schemas import SavedSummaryCreate, SavedSummaryResponse
-from routers.auth import get_current_user
-from models import User
+from auth import get_current_user_id
 
 router = APIRouter()
 
 
 @router.post("/save", response_model=SavedSummaryResponse, status_code=201)
-def save_summary(
+async def save_summary(
     data: SavedSummaryCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    current_user_id: int = Depends(get_current_user_id),
 ):
-    patient = db.query(Patient).filter(
-        Patient.id == data.patient_id,
-        Patient.caregiver_id == current_user.id,
-    ).first()
+    result = await db.execute(
+        select(Patient).where(
+            Patient.id == data.patient_id,
+            Patient.caregiver_id == current_user_id,
+        )
+    )
+    patient = result.scalar_one_or_none()
     if not patient:
         raise HTTPException(status_code=404, detail="Patient not found")
 
     record = SavedSummary(
-        user_id=current_user.id,
+        user_id=current_user_id,
         patient_id=data.patient_id,
         title=data.title,
         content=data.content,
@@ -33,35 +36,38 @@ def save_summary(
         date_range_end=data.date_range_end,
     )
     db.add(record)
-    db.commit()
-    db.refresh(record)
+    await db.commit()
+    await db.refresh(record)
     return record
 
 
 @router.get("/", response_model=List[SavedSummaryResponse])
-def get_saved_summaries(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+async def get_saved_summaries(
+    db: AsyncSession = Depends(get_db),
+    current_user_id: int = Depends(get_current_user_id),
 ):
-    return (
-        db.query(SavedSummary)
-        .filter(SavedSummary.user_id == current_user.id)
+    result = await db.execute(
+        select(SavedSummary)
+        .where(SavedSummary.user_id == current_user_id)
         .order_by(SavedSummary.created_at.desc())
-        .all()
     )
+    return result.scalars().all()
 
 
 @router.delete("/{summary_id}", status_code=204)
-def delete_saved_summary(
+async def delete_saved_summary(
     summary_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    current_user_id: int = Depends(get_current_user_id),
 ):
-    record = db.query(SavedSummary).filter(
-        SavedSummary.id == summary_id,
-        SavedSummary.user_id == current_user.id,
-    ).first()
+    result = await db.execute(
+        select(SavedSummary).where(
+            SavedSummary.id == summary_id,
+            SavedSummary.user_id == current_user_id,
+        )
+    )
+    record = result.scalar_one_or_none()
     if not record:
         raise HTTPException(status_code=404, detail="Summary not found")
-    db.delete(record)
-    db.commit()
+    await db.delete(record)
+    await db.commit()
@@ -1,12 +1,14 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm.attributes import flag_modified
 from typing import List
 
 from database import get_db
 import models
 import schemas
-from auth import get_current_user
+from auth import get_current_user_id
+from routers.logs import invalidate_today_log
 
 router = APIRouter()
 
@@ -14,28 +16,28 @@ MAX_CONTACTS = 20
 
 
 @router.get("/", response_model=List[schemas.SocialContactResponse])
-def list_contacts(
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
+async def list_contacts(
+    db: AsyncSession = Depends(get_db),
+    current_user_id: int = Depends(get_current_user_id),
 ):
-    return (
-        db.query(models.SocialContact)
-        .filter(models.SocialContact.user_id == current_user.id)
+    result = await db.execute(
+        select(models.SocialContact)
+        .where(models.SocialContact.user_id == current_user_id)
         .order_by(models.SocialContact.name)
-        .all()
     )
+    return result.scalars().all()
 
 
 @router.post("/", response_model=schemas.SocialContactResponse, status_code=201)
-def create_contact(
+async def create_contact(
     data: schemas.SocialContactCreate,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    current_user_id: int = Depends(get_current_user_id),
 ):
-    count = (
-        db.query(models.SocialContact)
-        .filter(models.SocialContact.user_id == current_user.id)
-        .count()
+    count = await db.scalar(
+        select(func.count())
+        .select_from(models.SocialContact)
+        .where(models.SocialContact.user_id == current_user_id)
     )
     if count >= MAX_CONTACTS:
         raise HTTPException(status_code=400, detail="Contact limit reached")
@@ -44,46 +46,43 @@ def create_contact(
     if not name or len(name) > 100:
         raise HTTPException(status_code=400, detail="Name must be between 1 and 100 characters")
 
-    contact = models.SocialContact(user_id=current_user.id, name=name)
+    contact = models.SocialContact(user_id=current_user_id, name=name)
     db.add(contact)
-    db.commit()
-    db.refresh(contact)
+    await db.commit()
+    await db.refresh(contact)
     return contact
 
 
 @router.delete("/{contact_id}", status_code=204)
-def delete_contact(
+async def delete_contact(
     contact_id: int,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    current_user_id: int = Depends(get_current_user_id),
 ):
-    contact = (
-        db.query(models.SocialContact)
-        .filter(
+    result = await db.execute(
+        select(models.SocialContact).where(
             models.SocialContact.id == contact_id,
-            models.SocialContact.user_id == current_user.id,
+            models.SocialContact.user_id == current_user_id,
         )
-        .first()
     )
+    contact = result.scalar_one_or_none()
     if not contact:
         raise HTTPException(status_code=404, detail="Contact not found")
 
     # Remove deleted contact_id from any existing daily_log socialization entries
-    patient_ids = [
-        p.id
-        for p in db.query(models.Patient)
-        .filter(models.Patient.caregiver_id == current_user.id)
-        .all()
-    ]
+    result = await db.execute(
+        select(models.Patient.id).where(models.Patient.caregiver_id == current_user_id)
+    )
+    patient_ids = result.scalars().all()
+    changed = []
     if patient_ids:
-        logs = (
-            db.query(models.DailyLog)
-            .filter(
+        result = await db.execute(
+            select(models.DailyLog).where(
                 models.DailyLog.patient_id.in_(patient_ids),
                 models.DailyLog.socialization.isnot(None),
             )
-            .all()
         )
+        logs = result.scalars().all()
         for log in logs:
             soc = log.socialization
             if not soc:
@@ -95,7 +94,10 @@ def delete_contact(
                     "contact_ids": [cid for cid in ids if cid != contact_id],
                 }
                 flag_modified(log, "socialization")
+                changed.append((log.patient_id, log.date))
 
-    db.delete(contact)
-    db.commit()
+    await db.delete(contact)
+    await db.commit()
+    for patient_id, log_date in changed:
+        invalidate_today_log(patient_id, log_date)
     return None
@@ -1,14 +1,18 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, timedelta, date as date_type
 from typing import Optional
 from collections import defaultdict
+import hashlib
 import json
 import os
+import orjson
 from dotenv import load_dotenv
-from openai import OpenAI
+from openai import AsyncOpenAI
+from cachetools import TTLCache
 
-from database import get_db
+from database import get_db, load_options
 import models
 from auth import get_current_user
 from routers.medications import lookup_known_side_effects
@@ -17,21 +21,68 @@ load_dotenv()
 
 router = APIRouter()
 
-
-def _calculate_adherence(logs, medications):
-    med_stats = {
-        med.id: {"name": med.name, "taken": 0, "total": 0}
-        for med in medications
-    }
-    for log in logs:
-        if not log.medications_taken:
-            continue
-        for entry in log.medications_taken:
-            mid = entry.get("medication_id")
-            if mid in med_stats:
-                med_stats[mid]["total"] += 1
-                if entry.get("taken"):
-                    med_stats[mid]["taken"] += 1
+# Prompt digest → generated summary. The prompts embed every log, medication and setting the
+# summary is built from, so any change to them yields a new key and no explicit eviction is needed.
+_summary_cache: TTLCache = TTLCache(maxsize=256, ttl=600)
+
+# Fixed instructions around the per-patient context and style guidance in the system prompt
+_SYSTEM_PROMPT_PREAMBLE = (
+    "You are a clinical documentation assistant helping caregivers communicate patient health data to doctors. "
+)
+_SYSTEM_PROMPT_RULES = (
+    "You receive structured daily health logs and produce a clear, doctor-ready summary. "
+    "Be specific with numbers and patterns. Symptoms are logged on a 1–10 severity scale. "
+    "Report average severity and flag days where severity ≥ 8. "
+    "When a treatment plan is provided, compare planned care against what actually happened — "
+    "note gaps (e.g. therapy planned 3x/week but adherence data shows missed sessions), "
+    "substance avoidance violations, and progress toward care goals. "
+    "Include treatment plan comparisons in the patterns and discussion_items fields where relevant. "
+    "Highlight correlations between medication adherence, activities, and symptom severity. "
+    "For the medication_side_effects field: for each medication, compare known drug side effects against what was actually observed. "
+    "Flag observed side effects that align with the known profile as expected. "
+    "Flag any observed side effects marked [unexpected] as requiring clinical attention. "
+    "If no side effects were observed, state that clearly and note it as reassuring. "
+    "Flag anything that warrants the doctor's attention. "
+    "Do not speculate beyond what the data shows. "
+    "Return ONLY valid JSON — no markdown fences, no extra text."
+)
+
+_openai_client: Optional[AsyncOpenAI] = None
+
+
+def _get_openai_client(api_key: str) -> AsyncOpenAI:
+    """Shared client, created on first use, so its connection pool and TLS sessions carry across summaries."""
+    global _openai_client
+    if _openai_client is None:
+        _openai_client = AsyncOpenAI(api_key=api_key)
+    return _openai_client
+
+
+def _pretty_json(value) -> str:
+    return orjson.dumps(value, option=orjson.OPT_INDENT_2).decode()
+
+
+# Per-medication dose counts computed server-side — one row per medication_id, no JSON decoding in Python.
+# Non-array values (legacy JSON nulls) are treated as empty so jsonb_array_elements never errors.
+_ADHERENCE_SQL = text("""
+SELECT (elem->>'medication_id')::int AS medication_id,
+       COUNT(*) AS total,
+       COUNT(*) FILTER (WHERE (elem->>'taken')::boolean) AS taken
+FROM daily_logs,
+     jsonb_array_elements(
+         CASE WHEN jsonb_typeof(medications_taken) = 'array'
+              THEN medications_taken
+              ELSE '[]'::jsonb
+         END
+     ) AS elem
+WHERE patient_id = :patient_id
+  AND date >= :start_date
+  AND date <= :end_date
+GROUP BY 1
+""")
+
+
+def _format_adherence(med_stats):
     return {
         mid: {
             "name": data["name"],
@@ -43,22 +94,37 @@ def _calculate_adherence(logs, medications):
     }
 
 
+async def _calculate_adherence_in_db(db: AsyncSession, patient_id: int, start_date, end_date, medications):
+    med_stats = {
+        med.id: {"name": med.name, "taken": 0, "total": 0}
+        for med in medications
+    }
+    result = await db.execute(
+        _ADHERENCE_SQL,
+        {"patient_id": patient_id, "start_date": start_date, "end_date": end_date},
+    )
+    for mid, total, taken in result:
+        if mid in med_stats:
+            med_stats[mid]["total"] = total
+            med_stats[mid]["taken"] = taken
+    return _format_adherence(med_stats)
+
+
 @router.post("/{patient_id}")
-def generate_summary(
+async def generate_summary(
     patient_id: int,
     start_date: Optional[date_type] = Query(None),
     end_date: Optional[date_type] = Query(None),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: models.User = Depends(get_current_user),
 ):
-    patient = (
-        db.query(models.Patient)
-        .filter(
+    result = await db.execute(
+        select(models.Patient).options(*load_options()).where(
             models.Patient.id == patient_id,
             models.Patient.caregiver_id == current_user.id,
         )
-        .first()
     )
+    patient = result.scalar_one_or_none()
     if not patient:
         raise HTTPException(status_code=404, detail="Patient not found")
 
@@ -68,16 +134,29 @@ def generate_summary(
     if end_date is None:
         end_date = today
 
-    logs = (
-        db.query(models.DailyLog)
-        .filter(
+    # Read-only aggregation: project just the columns the summary uses (skips photo, vitals, etc.)
+    # and iterate plain rows instead of building ORM objects
+    result = await db.execute(
+        select(
+            models.DailyLog.date,
+            models.DailyLog.sleep_hours,
+            models.DailyLog.mood_score,
+            models.DailyLog.water_intake_oz,
+            models.DailyLog.symptoms,
+            models.DailyLog.activities,
+            models.DailyLog.lifestyle,
+            models.DailyLog.medications_taken,
+            models.DailyLog.medication_side_effects,
+            models.DailyLog.notes,
+        )
+        .where(
             models.DailyLog.patient_id == patient_id,
             models.DailyLog.date >= start_date,
             models.DailyLog.date <= end_date,
         )
         .order_by(models.DailyLog.date.asc())
-        .all()
     )
+    logs = result.all()
 
     date_range_days = (end_date - start_date).days + 1
 
@@ -91,16 +170,15 @@ def generate_summary(
             "adherence_data": {},
         }
 
-    medications = (
-        db.query(models.Medication)
-        .filter(
+    result = await db.execute(
+        select(models.Medication).options(*load_options()).where(
             models.Medication.patient_id == patient_id,
             models.Medication.active == True,
         )
-        .all()
     )
+    medications = result.scalars().all()
 
-    adherence = _calculate_adherence(logs, medications)
+    adherence = await _calculate_adherence_in_db(db, patient_id, start_date, end_date, medications)
 
     # Read condition context and summary style from user config
     user_config = current_user.user_config or {}
@@ -111,79 +189,110 @@ def generate_summary(
     summary_style = user_config.get("summary_style", "adaptive")
 
     # Fetch treatment plan if one exists
-    treatment_plan = (
-        db.query(models.TreatmentPlan)
-        .filter(models.TreatmentPlan.patient_id == patient_id)
-        .first()
+    result = await db.execute(
+        select(models.TreatmentPlan)
+        .options(*load_options())
+        .where(models.TreatmentPlan.patient_id == patient_id)
     )
+    treatment_plan = result.scalar_one_or_none()
 
-    # Aggregate statistics
-    sleep_vals, mood_vals, water_vals = [], [], []
+    # Aggregate statistics in a single pass over the logs. Containers are bound to locals and
+    # averages kept as running (sum, count) pairs so nothing needs a second pass afterwards.
+    sleep_sum, sleep_n = 0, 0
+    mood_sum, mood_n = 0, 0
     symptom_counts: dict = defaultdict(lambda: {"severe": 0, "moderate": 0, "none": 0})
     activity_counts = defaultdict(int)
     side_effect_counts = defaultdict(lambda: defaultdict(int))
     lifestyle_totals = defaultdict(int)
+    hydration_counts: dict = defaultdict(int)
+    # medication_id → side effect name → [days observed, severity sum]
+    observed_side_effects: dict = defaultdict(dict)
     log_entries = []
 
     HYDRATION_LABELS = {80: "Good", 48: "Fair", 24: "Poor"}
 
+    _sympt = symptom_counts
+    _acts = activity_counts
+    _se = side_effect_counts
+    _lt = lifestyle_totals
+    _hydration = hydration_counts
+    _observed = observed_side_effects
+    _hydration_label = HYDRATION_LABELS.get
+    _entries = log_entries.append
+
     for log in logs:
-        if log.sleep_hours is not None:
-            sleep_vals.append(log.sleep_hours)
-        if log.mood_score is not None:
-            mood_vals.append(log.mood_score)
-        if log.water_intake_oz is not None:
-            water_vals.append(log.water_intake_oz)
-
-        for s in (log.symptoms or []):
-            name = s["name"]
+        sleep = log.sleep_hours
+        mood = log.mood_score
+        water = log.water_intake_oz
+        symptoms = log.symptoms
+        activities = log.activities
+        lifestyle = log.lifestyle
+        med_side_effects = log.medication_side_effects
+
+        if sleep is not None:
+            sleep_sum += sleep
+            sleep_n += 1
+        if mood is not None:
+            mood_sum += mood
+            mood_n += 1
+
+        water_label = None
+        if water is not None:
+            water_label = _hydration_label(water)
+            _hydration[water_label or "other"] += 1
+
+        for s in (symptoms or ()):
             sev = s.get("severity")
             if sev is None:
                 continue
+            counts = _sympt[s["name"]]
             if sev >= 8:
-                symptom_counts[name]["severe"] += 1
+                counts["severe"] += 1
             elif sev >= 5:
-                symptom_counts[name]["moderate"] += 1
+                counts["moderate"] += 1
             else:
-                symptom_counts[name]["none"] += 1
+                counts["none"] += 1
 
-        for a in (log.activities or []):
-            activity_counts[a["type"]] += 1
+        for a in (activities or ()):
+            _acts[a["type"]] += 1
 
-        for med_se in (log.medication_side_effects or []):
-            for se in med_se.get("side_effects", []):
-                side_effect_counts[med_se["medication_name"]][se["name"]] += 1
-
-        if log.lifestyle:
-            for k, v in log.lifestyle.items():
+        for med_se in (med_side_effects or ()):
+            se_list = med_se.get("side_effects")
+            if not se_list:
+                # Don't create empty per-medication keys; they'd show up in the prompt
+                continue
+            per_med_counts = _se[med_se["medication_name"]]
+            observed = _observed[med_se.get("medication_id")]
+            for se in se_list:
+                se_name = se["name"]
+                per_med_counts[se_name] += 1
+                seen = observed.get(se_name)
+                if seen is None:
+                    observed[se_name] = [1, se.get("severity", 5)]
+                else:
+                    seen[0] += 1
+                    seen[1] += se.get("severity", 5)
+
+        if lifestyle:
+            for k, v in lifestyle.items():
                 if v:
-                    lifestyle_totals[k] += 1
+                    _lt[k] += 1
 
-        water_label = HYDRATION_LABELS.get(log.water_intake_oz) if log.water_intake_oz is not None else None
-        log_entries.append({
+        _entries({
             "date": log.date.isoformat(),
-            "mood": log.mood_score,
-            "sleep_hours": log.sleep_hours,
-            "hydration": water_label or (f"{log.water_intake_oz}oz" if log.water_intake_oz is not None else None),
-            "symptoms": log.symptoms,
-            "activities": log.activities,
-            "lifestyle": log.lifestyle,
+            "mood": mood,
+            "sleep_hours": sleep,
+            "hydration": water_label or (f"{water}oz" if water is not None else None),
+            "symptoms": symptoms,
+            "activities": activities,
+            "lifestyle": lifestyle,
             "medications_taken": log.medications_taken,
-            "medication_side_effects": log.medication_side_effects,
+            "medication_side_effects": med_side_effects,
             "notes": log.notes,
         })
 
-    avg_sleep = round(sum(sleep_vals) / len(sleep_vals), 1) if sleep_vals else None
-    avg_mood = round(sum(mood_vals) / len(mood_vals), 1) if mood_vals else None
-
-    # Hydration summary
-    hydration_counts: dict = defaultdict(int)
-    for v in water_vals:
-        label = HYDRATION_LABELS.get(v, "other")
-        hydration_counts[label] += 1
-
-    # Precompute for JSON serialisation (defaultdicts aren't directly serialisable)
-    side_effects_serializable = {k: dict(v) for k, v in side_effect_counts.items()}
+    avg_sleep = round(sleep_sum / sleep_n, 1) if sleep_n else None
+    avg_mood = round(mood_sum / mood_n, 1) if mood_n else None
 
     # Build symptom tracking text
     total_logs = len(logs)
@@ -209,19 +318,11 @@ def generate_summary(
         known = lookup_known_side_effects(med.name)
         med_known_effects[med.id] = {e["name"]: e for e in known}
         known_strs = [f"{e['name']} ({e['frequency']})" for e in known] or ["none on record"]
-        # Gather observed side effects for this med across all logs
-        observed_counts: dict = defaultdict(lambda: {"count": 0, "severity_sum": 0})
-        for log in logs:
-            for mse in (log.medication_side_effects or []):
-                if mse.get("medication_id") == med.id:
-                    for se in mse.get("side_effects", []):
-                        observed_counts[se["name"]]["count"] += 1
-                        observed_counts[se["name"]]["severity_sum"] += se.get("severity", 5)
         observed_strs = []
-        for se_name, data in observed_counts.items():
-            avg_sev = round(data["severity_sum"] / data["count"], 1)
+        for se_name, (count, severity_sum) in observed_side_effects.get(med.id, {}).items():
+            avg_sev = round(severity_sum / count, 1)
             is_known = se_name in med_known_effects[med.id]
-            observed_strs.append(f"{se_name} on {data['count']} day(s) (avg severity {avg_sev}/10){' [known side effect]' if is_known else ' [unexpected]'}")
+            observed_strs.append(f"{se_name} on {count} day(s) (avg severity {avg_sev}/10){' [known side effect]' if is_known else ' [unexpected]'}")
         observed_text = ", ".join(observed_strs) if observed_strs else "none reported"
         known_se_context_lines.append(
             f"  {med.name}:\n    Known: {', '.join(known_strs)}\n    Observed: {observed_text}"
@@ -298,13 +399,13 @@ SYMPTOM TRACKING (Severity on a 1–10 scale — out of {total_logs} logged days
 {symptom_tracking_text}
 
 ACTIVITY FREQUENCY (number of days each activity was logged):
-{json.dumps(dict(activity_counts), indent=2)}
+{_pretty_json(activity_counts)}
 
 LIFESTYLE FACTOR TOTALS (out of {total_logs} logged days):
-{json.dumps(dict(lifestyle_totals), indent=2)}
+{_pretty_json(lifestyle_totals)}
 
 MEDICATION SIDE EFFECT OCCURRENCES (medication → side effect → count):
-{json.dumps(side_effects_serializable, indent=2)}
+{_pretty_json(side_effect_counts)}
 
 KEY PATTERNS TO ANALYZE:
 - Identify days where symptoms were Severe and what preceded them (missed meds, lifestyle factors, activities)
@@ -315,7 +416,7 @@ KEY PATTERNS TO ANALYZE:
 - Highlight week-over-week changes if visible in the raw data
 
 RAW LOG DATA (chronological):
-{json.dumps(log_entries, indent=2)}
+{_pretty_json(log_entries)}
 
 Please generate a summary as JSON with exactly these fields:
 {{
@@ -341,35 +442,23 @@ Please generate a summary as JSON with exactly these fields:
   ]
 }}"""
 
-    system_prompt = (
-        f"You are a clinical documentation assistant helping caregivers communicate patient health data to doctors. "
-        f"Patient context: {condition_context} "
-        f"{style_instruction} "
-        f"You receive structured daily health logs and produce a clear, doctor-ready summary. "
-        f"Be specific with numbers and patterns. Symptoms are logged on a 1–10 severity scale. "
-        f"Report average severity and flag days where severity ≥ 8. "
-        f"When a treatment plan is provided, compare planned care against what actually happened — "
-        f"note gaps (e.g. therapy planned 3x/week but adherence data shows missed sessions), "
-        f"substance avoidance violations, and progress toward care goals. "
-        f"Include treatment plan comparisons in the patterns and discussion_items fields where relevant. "
-        f"Highlight correlations between medication adherence, activities, and symptom severity. "
-        f"For the medication_side_effects field: for each medication, compare known drug side effects against what was actually observed. "
-        f"Flag observed side effects that align with the known profile as expected. "
-        f"Flag any observed side effects marked [unexpected] as requiring clinical attention. "
-        f"If no side effects were observed, state that clearly and note it as reassuring. "
-        f"Flag anything that warrants the doctor's attention. "
-        f"Do not speculate beyond what the data shows. "
-        f"Return ONLY valid JSON — no markdown fences, no extra text."
-    )
+    system_prompt = f"{_SYSTEM_PROMPT_PREAMBLE}Patient context: {condition_context} {style_instruction} {_SYSTEM_PROMPT_RULES}"
+
+    model = os.getenv("OPENAI_MODEL", "gpt-4.1-mini")
+    cache_key = hashlib.sha256(
+        f"{model}\0{system_prompt}\0{user_prompt}".encode()
+    ).digest()
+    cached = _summary_cache.get(cache_key)
+    if cached is not None:
+        return cached
 
     api_key = os.getenv("OPENAI_API_KEY")
     if not api_key:
         raise HTTPException(status_code=500, detail="OPENAI_API_KEY not configured")
 
-    model = os.getenv("OPENAI_MODEL", "gpt-4.1-mini")
     try:
-        client = OpenAI(api_key=api_key)
-        completion = client.chat.completions.create(
+        client = _get_openai_client(api_key)
+        completion = await client.chat.completions.create(
             model=model,
             response_format={"type": "json_object"},
             messages=[
@@ -400,4 +489,5 @@ Please generate a summary as JSON with exactly these fields:
         str(mid): d for mid, d in adherence.items()
     }
 
+    _summary_cache[cache_key] = summary_data
     return summary_data
@@ -2,6 +2,14 @@ from pydantic import BaseModel, EmailStr
 from typing import Optional, List, Any, Dict
 from datetime import date, datetime
 from enum import Enum
+import orjson
+
+
+class FastModel(BaseModel):
+    """Response model that encodes itself with orjson instead of going through FastAPI's jsonable_encoder."""
+
+    def to_json_bytes(self) -> bytes:
+        return orjson.dumps(self.model_dump(mode="json"))
 
 
 class UserRole(str, Enum):
@@ -76,7 +84,7 @@ class MedicationUpdate(BaseModel):
     active: Optional[bool] = None
 
 
-class MedicationResponse(BaseModel):
+class MedicationResponse(FastModel):
     id: int
     patient_id: int
     name: str
@@ -105,7 +113,7 @@ class PatientUpdate(BaseModel):
     notes: Optional[str] = None
 
 
-class PatientResponse(BaseModel):
+class PatientResponse(FastModel):
     id: int
     name: str
     date_of_birth: Optional[date] = None
@@ -211,7 +219,7 @@ class DailyLogCreate(BaseModel):
     log_type: str = "detailed"
 
 
-class DailyLogResponse(BaseModel):
+class DailyLogResponse(FastModel):
     id: int
     patient_id: int
     logged_by: int